@@ -14,8 +14,8 @@ const DEFAULT_CODES = ["USD", "KRW", "PHP", "EUR", "JPY"]; // initial selection
 const MIN_FIELDS = 1;
 const MAX_FIELDS = 5;
 
-// Pretty version label for UX (semver-ish). Override with ?ver=1.3.5
-const UI_SEMVER = "1.3.5";
+// Pretty version label for UX (semver-ish). Override with ?ver=1.3.6
+const UI_SEMVER = "1.3.6";
 
 const CODE_LABEL = {
   USD: "미국 달러 (USD)",
@@ -288,8 +288,10 @@ function saveHistory(list) {
   localStorage.setItem(STORAGE_KEY, JSON.stringify(list.slice(0, MAX_SAVED)));
 }
 
+const THOUSANDS_RE = /\B(?=(\d{3})+(?!\d))/g;
+
 function commaInt(s) {
-  return s.replace(/\B(?=(\d{3})+(?!\d))/g, ",");
+  return s.replace(THOUSANDS_RE, ",");
 }
 
 function formatRecordAmount(code, n) {
@@ -379,7 +381,8 @@ function renderHistory(list, onDelete) {
 }
 
 async function loadSnapshot() {
-  const res = await fetch(`./data/rates.json?t=${Date.now()}`);
+  // Revalidate instead of cache-busting so an unchanged snapshot is a 304.
+  const res = await fetch("./data/rates.json", { cache: "no-cache" });
   if (!res.ok) throw new Error("rates.json not found");
   return await res.json();
 }
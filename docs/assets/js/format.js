@@ -1,10 +1,20 @@
 // Formatting/parsing helpers for editable currency inputs.
 
+// Shared patterns, compiled once at module load.
+const COMMA_RE = /,/g;
+const EDITABLE_NUMBER_RE = /^\d*\.?\d*$/;
+const LEADING_ZEROS_RE = /^0+(?=\d)/;
+const THOUSANDS_RE = /\B(?=(\d{3})+(?!\d))/g;
+
+function groupThousands(intText) {
+  return intText.replace(THOUSANDS_RE, ",");
+}
+
 export function cleanEditableNumberText(value) {
-  const cleaned = String(value).replace(/,/g, "").trim();
+  const cleaned = String(value).replace(COMMA_RE, "").trim();
   if (cleaned === "") return "";
   if (cleaned.includes("-")) return "";
-  if (!/^\d*\.?\d*$/.test(cleaned)) return "";
+  if (!EDITABLE_NUMBER_RE.test(cleaned)) return "";
   return cleaned;
 }
 
@@ -21,19 +31,23 @@ export function formatEditableNumberText(cleaned) {
   const hasDot = cleaned.includes(".");
   let [intPart, fracPart] = cleaned.split(".");
   if (intPart === "") intPart = "0";
-  intPart = intPart.replace(/^0+(?=\d)/, "");
-  intPart = intPart.replace(/\B(?=(\d{3})+(?!\d))/g, ",");
+  intPart = intPart.replace(LEADING_ZEROS_RE, "");
+  intPart = groupThousands(intPart);
   if (!hasDot) return intPart;
   if (fracPart === undefined) return `${intPart}.`;
   return `${intPart}.${fracPart}`;
 }
 
+// One shared formatter: native grouping + rounding instead of toFixed + regex
+// on every keystroke.
+const INPUT_VALUE_FORMAT = new Intl.NumberFormat("en-US", {
+  minimumFractionDigits: 2,
+  maximumFractionDigits: 2,
+});
+
 export function toInputValue(value) {
   if (!Number.isFinite(value) || value < 0) return "0.00";
-  const normalized = value.toFixed(2);
-  const parts = normalized.split(".");
-  parts[0] = parts[0].replace(/\B(?=(\d{3})+(?!\d))/g, ",");
-  return parts.join(".");
+  return INPUT_VALUE_FORMAT.format(value);
 }
 
 function nonCommaIndex(text, caretPos) {
@@ -3,45 +3,239 @@
 """Local server for the GitHub Pages build.
 
 The production demo is served via GitHub Pages from `docs/`.
-This Flask app exists only to run the same static build locally.
+This Flask app exists only to run the same static build locally
+(`python exchange_rate_calculator.py`), or behind gunicorn with
+`gunicorn -c gunicorn.conf.py exchange_rate_calculator:app`.
 
 Routes:
 - GET /                 -> docs/index.html
 - GET /assets/...       -> docs/assets/...
 - GET /data/...         -> docs/data/...
 
+Text assets (HTML/CSS/JS/JSON/SVG, including the rates snapshot) are read once
+and served from memory together with precompressed gzip (and brotli, when the
+`brotli` package is installed) copies, so repeated page loads don't hit the
+disk or compress per request. Every RATES_TTL_SECONDS a daemon thread stat()s
+each cached file and only re-reads it, swapping the cached entry, when its
+(st_mtime_ns, st_size) changed; deleted files are dropped. With
+DISABLE_RATE_REFRESHER set, the same check runs lazily on the first request
+after the TTL.
+Misses are remembered for MISS_TTL_SECONDS so repeated 404s skip the disk.
+They carry an ETag and a short Cache-Control so browsers revalidate with a
+cheap 304; /assets/ URLs with a version query (`?v=1.3.6`, as index.html
+uses) are cached for a year as immutable. Other files go through send_from_directory.
+
 No user data is stored server-side.
 """
 
 from __future__ import annotations
 
+import gzip
+import hashlib
+import mimetypes
 import os
+import threading
+import time
+from dataclasses import dataclass, replace
 from pathlib import Path
 
-from flask import Flask, abort, send_from_directory
+from flask import Flask, Response, abort, request, send_from_directory
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # Optional; gzip alone is fine.
+    brotli = None
 
 
 DOCS_DIR = Path(__file__).resolve().parent / "docs"
+INDEX_PATH = DOCS_DIR / "index.html"
+RATES_TTL_SECONDS = float(os.getenv("RATES_TTL_SECONDS", "60"))
+MISS_TTL_SECONDS = 5.0
+CACHE_CONTROL = "public, max-age=30, stale-while-revalidate=60"
+VERSIONED_CACHE_CONTROL = "public, max-age=31536000, immutable"
+COMPRESSIBLE_SUFFIXES = frozenset({".html", ".css", ".js", ".json", ".svg", ".txt"})
+
+
+@dataclass(frozen=True, slots=True)
+class CachedFile:
+    loaded_at: float
+    data: bytes
+    gzip_data: bytes
+    br_data: bytes | None
+    etag: str
+    # (st_mtime_ns, st_size) when read; a match means the bytes are still current.
+    stat_key: tuple[int, int]
+
+
+# Keyed by absolute path. Entries are replaced wholesale (never mutated), so
+# readers can take them without the lock.
+_cache: dict[Path, CachedFile] = {}
+_cache_lock = threading.Lock()
+_refresher_started = False
+
+# path -> monotonic time until which an unreadable (missing, directory, ...)
+# path is reported without a stat.
+_misses: dict[Path, float] = {}
+_MAX_MISSES = 1024
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip() in {"1", "true", "True", "yes", "YES"}
+
 
 # Disable Flask's default /static mapping; we serve from docs/ instead.
 app = Flask(__name__, static_folder=None)
 
 
+def _stat_key(path: Path) -> tuple[int, int]:
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+
+def _load(path: Path) -> CachedFile:
+    stat_key = _stat_key(path)
+    data = path.read_bytes()
+    return CachedFile(
+        loaded_at=time.monotonic(),
+        data=data,
+        gzip_data=gzip.compress(data, 9),
+        br_data=brotli.compress(data, quality=11) if brotli is not None else None,
+        etag=hashlib.blake2b(data, digest_size=8).hexdigest(),
+        stat_key=stat_key,
+    )
+
+
+def _get_cached(path: Path, ttl: float = RATES_TTL_SECONDS) -> CachedFile:
+    """Return `path` from memory, checking it for changes at most once per `ttl`.
+
+    The file is only re-read and recompressed when its mtime or size changed.
+    """
+    cached = _cache.get(path)
+    if cached is not None and (_refresher_started or time.monotonic() - cached.loaded_at < ttl):
+        return cached
+    if _misses.get(path, 0.0) > time.monotonic():
+        raise FileNotFoundError(path)
+    with _cache_lock:
+        cached = _cache.get(path)
+        now = time.monotonic()
+        if cached is not None:
+            if now - cached.loaded_at < ttl:
+                return cached
+            try:
+                if _stat_key(path) == cached.stat_key:
+                    cached = replace(cached, loaded_at=now)
+                    _cache[path] = cached
+                    return cached
+            except OSError:
+                pass  # Recorded as a miss below.
+        try:
+            cached = _load(path)
+        except OSError:
+            if len(_misses) >= _MAX_MISSES:
+                _misses.clear()
+            _misses[path] = time.monotonic() + MISS_TTL_SECONDS
+            raise
+        _cache[path] = cached
+        return cached
+
+
+def _refresher(interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        for path, old in list(_cache.items()):
+            try:
+                if _stat_key(path) != old.stat_key:
+                    _cache[path] = _load(path)
+            except FileNotFoundError:
+                _cache.pop(path, None)  # Deleted: 404 from now on.
+            except OSError:
+                continue  # Transient; keep serving the last good copy.
+
+
+def start_refresher(interval: float = RATES_TTL_SECONDS) -> None:
+    """Start the background thread that keeps cached files up to date.
+
+    No-op if DISABLE_RATE_REFRESHER is set or this process already has one.
+    """
+    global _refresher_started
+    if _env_flag("DISABLE_RATE_REFRESHER"):
+        return
+    with _cache_lock:
+        if _refresher_started:
+            return
+        _refresher_started = True
+    threading.Thread(target=_refresher, args=(interval,), name="rates-refresher", daemon=True).start()
+
+
+def _cached_response(path: Path, mimetype: str) -> Response:
+    try:
+        cached = _get_cached(path)
+    except OSError:
+        abort(404)
+
+    offered = ("br", "gzip") if cached.br_data is not None else ("gzip",)
+    encoding = request.accept_encodings.best_match(offered)
+    # Each encoding is a different representation, so it gets its own tag.
+    if encoding == "br":
+        response = Response(cached.br_data, mimetype=mimetype)
+        response.headers["Content-Encoding"] = "br"
+        response.set_etag(f"{cached.etag}-br")
+    elif encoding == "gzip":
+        response = Response(cached.gzip_data, mimetype=mimetype)
+        response.headers["Content-Encoding"] = "gzip"
+        response.set_etag(f"{cached.etag}-gz")
+    else:
+        response = Response(cached.data, mimetype=mimetype)
+        response.set_etag(cached.etag)
+    response.vary.add("Accept-Encoding")
+    # index.html bumps ?v= whenever an asset changes, so versioned asset URLs
+    # never change. Pages and data always revalidate.
+    versioned = request.path.startswith("/assets/") and "v" in request.args
+    response.headers["Cache-Control"] = VERSIONED_CACHE_CONTROL if versioned else CACHE_CONTROL
+    return response.make_conditional(request)
+
+
 @app.get("/")
 def index() -> object:
-    return send_from_directory(DOCS_DIR, "index.html")
+    return _cached_response(INDEX_PATH, "text/html")
 
 
 @app.get("/<path:subpath>")
 def docs_files(subpath: str) -> object:
-    # Basic existence check to return 404 instead of a 500.
-    if not (DOCS_DIR / subpath).exists():
-        abort(404)
+    path = safe_join(str(DOCS_DIR), subpath)
+    if path is not None and Path(path).suffix in COMPRESSIBLE_SUFFIXES:
+        mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        return _cached_response(Path(path), mimetype)
+    # send_from_directory already raises NotFound for missing files.
     return send_from_directory(DOCS_DIR, subpath)
 
 
+def _after_fork_in_child() -> None:
+    # Threads don't survive fork(): gunicorn workers (see post_fork in
+    # gunicorn.conf.py) start their own refresher and get a fresh lock.
+    global _cache_lock, _refresher_started
+    _cache_lock = threading.Lock()
+    _refresher_started = False
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+# Warm the cache at import so preloaded gunicorn workers inherit it.
+for _path in (INDEX_PATH, DOCS_DIR / "data" / "rates.json"):
+    try:
+        _get_cached(_path)
+    except OSError:
+        pass
+
+# Under gunicorn's preload_app the import runs in the master, which serves
+# nothing; gunicorn.conf.py sets this flag and starts refreshers in post_fork.
+if not _env_flag("RATES_REFRESHER_POST_FORK"):
+    start_refresher()
+
+
 if __name__ == "__main__":
     host = os.getenv("HOST", "127.0.0.1")
     port = int(os.getenv("PORT", "5000"))
-    debug = os.getenv("DEBUG", "").strip() in {"1", "true", "True", "yes", "YES"}
+    debug = _env_flag("DEBUG")
     app.run(host=host, port=port, debug=debug)
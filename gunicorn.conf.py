@@ -0,0 +1,27 @@
+"""Gunicorn settings shared by Procfile, Dockerfile and render.yaml.
+
+Usage: gunicorn -c gunicorn.conf.py exchange_rate_calculator:app
+
+The app only serves files from memory/disk (no upstream calls per request),
+so threaded workers are enough; no gevent monkey-patching is needed.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+timeout = 60
+
+# Import the app (and warm its file cache) once in the master; workers share it.
+preload_app = True
+# Keep the import from starting a refresher thread in the master.
+os.environ["RATES_REFRESHER_POST_FORK"] = "1"
+
+
+def post_fork(server, worker):
+    # Each worker runs its own refresher; threads don't survive fork().
+    from exchange_rate_calculator import start_refresher
+
+    start_refresher()
@@ -7,20 +7,32 @@ Data source: https://finance.naver.com/marketindex/exchangeList.naver
 Notes:
 - Naver page provides columns: mid-market, cash buy/sell, remit send/receive.
 - JPY/VND are shown per 100 units; we normalize to 1 unit.
+- The page is euc-kr, but everything we extract is ASCII, so it is parsed as
+  raw bytes without decoding.
+- The page's Last-Modified is stored in the snapshot and sent back as
+  If-Modified-Since; on 304 Not Modified the snapshot is left untouched.
 """
 
 from __future__ import annotations
 
+import gzip
+import http.client
 import json
 import os
+import random
 import re
+import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
+from urllib.error import HTTPError
 from urllib.request import Request, urlopen
 
 
 NAVER_EXCHANGE_LIST_URL = "https://finance.naver.com/marketindex/exchangeList.naver"
+OUT_PATH = Path(__file__).resolve().parents[1] / "docs" / "data" / "rates.json"
+FETCH_TIMEOUT_SECONDS = 5.0
+FETCH_ATTEMPTS = 2
 
 # Keep everything ASCII in the snapshot to avoid mojibake across environments.
 CURRENCY_META: dict[str, dict[str, object]] = {
@@ -36,44 +48,125 @@ CURRENCY_META: dict[str, dict[str, object]] = {
     "AUD": {"label": "Australian Dollar (AUD)", "market_code": "FX_AUDKRW", "source_unit": 1},
 }
 
+# (code, market_code, source_unit) for every scraped currency, resolved once.
+_ACTIVE: tuple[tuple[str, str, float], ...] = tuple(
+    (code, str(meta["market_code"]), float(meta["source_unit"]))
+    for code, meta in CURRENCY_META.items()
+    if meta["market_code"] is not None
+)
+_PUBLISHED_MARKET_CODES: frozenset[bytes] = frozenset(market_code.encode("ascii") for _, market_code, _ in _ACTIVE)
 
-@dataclass(frozen=True, slots=True)
-class Snapshot:
-    fetched_at: str
-    rates_by_type: dict[str, dict[str, float]]
-
+# Static part of the snapshot; doesn't depend on the fetched rates.
+_CURRENCIES: list[dict[str, object]] = [
+    {"code": code, "label": meta["label"], "source_unit": meta["source_unit"]}
+    for code, meta in CURRENCY_META.items()
+]
 
-def _iter_rows(html: str) -> list[str]:
-    return [m.group(0) for m in re.finditer(r"<tr>\s*.*?</tr>", html, flags=re.DOTALL)]
 
+_MARKET_CODE_RE = re.compile(rb"marketindexCd=(FX_[A-Z]+)")
+# Only numeric cells match, so name cells and "-" placeholders are skipped by the regex.
+_NUM_TD_RE = re.compile(rb"<td[^>]*>\s*([\d,]+(?:\.\d+)?)\s*</td>")
 
-def _find_row(rows: list[str], market_code: str) -> str:
-    for row in rows:
-        if f"marketindexCd={market_code}" in row and 'class="tit"' in row:
-            return row
-    raise ValueError(f"Row not found: {market_code}")
 
-
-def _parse_row_numbers(row_html: str) -> list[float]:
-    tds = re.findall(r"<td[^>]*>\s*([^<]+?)\s*</td>", row_html, flags=re.DOTALL)
-    numbers: list[float] = []
-    for raw in tds:
-        cleaned = raw.strip().replace(",", "")
-        if cleaned == "" or cleaned == "-":
-            continue
+@dataclass(frozen=True, slots=True)
+class Snapshot:
+    fetched_at: str
+    rates_by_type: dict[str, dict[str, float]]
+    source_last_modified: str
+
+
+def _table_slice(html: bytes) -> bytes:
+    """Narrow the page to the exchange table; fall back to the whole page."""
+    start = html.find(b'class="tbl_exchange')
+    if start < 0:
+        return html
+    end = html.find(b"</table>", start)
+    return html[start:] if end < 0 else html[start:end]
+
+
+def _index_rows(html: bytes) -> dict[str, bytes]:
+    """Scan the page once and map each market code to its table row.
+
+    Rows are located with bytes.find/rfind around each marketindexCd= link
+    rather than by regex-matching every <tr> on the page; a row's start is
+    never looked for before the previous row's </tr>.
+    """
+    rows: dict[str, bytes] = {}
+    pos = html.find(b"marketindexCd=")
+    while pos >= 0:
+        end = html.find(b"</tr>", pos)
+        if end < 0:
+            break
+        end += len(b"</tr>")
+        code = _MARKET_CODE_RE.match(html, pos)
+        # Rows for currencies we don't publish are skipped without slicing.
+        if code is not None and code.group(1) in _PUBLISHED_MARKET_CODES:
+            # The row opens after the previous row's </tr>; its <tr may carry attributes.
+            start = html.find(b"<tr", max(html.rfind(b"</tr>", 0, pos), 0), pos)
+            while start >= 0 and html[start + 3] not in b"> \t\r\n":
+                start = html.find(b"<tr", start + 3, pos)
+            row = html[start:end] if start >= 0 else b""
+            if b'class="tit"' in row:
+                rows.setdefault(code.group(1).decode("ascii"), row)
+        pos = html.find(b"marketindexCd=", end)
+    return rows
+
+
+def _find_row(rows: dict[str, bytes], market_code: str) -> bytes:
+    try:
+        return rows[market_code]
+    except KeyError:
+        raise ValueError(f"Row not found: {market_code}") from None
+
+
+def _parse_row_numbers(row_html: bytes) -> list[float]:
+    return [float(raw.replace(b",", b"")) for raw in _NUM_TD_RE.findall(row_html)]
+
+
+def _download(req: Request) -> tuple[bytes, str] | None:
+    try:
+        with urlopen(req, timeout=FETCH_TIMEOUT_SECONDS) as response:
+            html = response.read()
+            if response.headers.get("Content-Encoding", "").lower() == "gzip":
+                html = gzip.decompress(html)
+            return html, response.headers.get("Last-Modified", "")
+    except HTTPError as e:
+        if e.code == 304:
+            return None
+        raise
+
+
+def _fetch_html(if_modified_since: str = "") -> tuple[bytes, str] | None:
+    """Download the exchange list page, retrying on a transient failure.
+
+    Returns (html, Last-Modified), or None if the page is unchanged since
+    `if_modified_since`. If the last attempt fails the error propagates and
+    the previously committed snapshot stays in place.
+    """
+    headers = {"User-Agent": "Mozilla/5.0", "Accept-Encoding": "gzip"}
+    if if_modified_since:
+        headers["If-Modified-Since"] = if_modified_since
+    req = Request(NAVER_EXCHANGE_LIST_URL, headers=headers)
+    for attempt in range(1, FETCH_ATTEMPTS):
         try:
-            numbers.append(float(cleaned))
-        except ValueError:
-            continue
-    return numbers
-
-
-def fetch_snapshot() -> Snapshot:
-    req = Request(NAVER_EXCHANGE_LIST_URL, headers={"User-Agent": "Mozilla/5.0"})
-    with urlopen(req, timeout=20) as response:
-        html = response.read().decode("euc-kr", errors="ignore")
-
-    rows = _iter_rows(html)
+            return _download(req)
+        except HTTPError as e:
+            if 400 <= e.code < 500:
+                raise  # Permanent; retrying won't help.
+            time.sleep(0.25 * attempt + random.uniform(0, 0.25))
+        except (OSError, http.client.HTTPException):
+            # URLError, timeouts, and resets/IncompleteRead during read().
+            time.sleep(0.25 * attempt + random.uniform(0, 0.25))
+    return _download(req)
+
+
+def fetch_snapshot(if_modified_since: str = "") -> Snapshot | None:
+    fetched = _fetch_html(if_modified_since)
+    if fetched is None:
+        return None
+    html, last_modified = fetched
+
+    rows = _index_rows(_table_slice(html))
     rates_by_type: dict[str, dict[str, float]] = {
         "sale": {"KRW": 1.0},
         "buy": {"KRW": 1.0},
@@ -81,47 +174,62 @@ def fetch_snapshot() -> Snapshot:
         "send": {"KRW": 1.0},
         "receive": {"KRW": 1.0},
     }
-
-    for code, meta in CURRENCY_META.items():
-        market_code = meta["market_code"]
-        unit = float(meta["source_unit"])
-        if market_code is None:
-            continue
-
-        row = _find_row(rows, str(market_code))
+    sale_d = rates_by_type["sale"]
+    buy_d = rates_by_type["buy"]
+    sell_d = rates_by_type["sell"]
+    send_d = rates_by_type["send"]
+    receive_d = rates_by_type["receive"]
+
+    for code, market_code, unit in _ACTIVE:
+        row = _find_row(rows, market_code)
         cols = _parse_row_numbers(row)
         if len(cols) < 5:
             raise RuntimeError(f"Not enough columns for {code}: {cols}")
 
         sale, buy, sell, send, receive = cols[0], cols[1], cols[2], cols[3], cols[4]
-        rates_by_type["sale"][code] = sale / unit
-        rates_by_type["buy"][code] = buy / unit
-        rates_by_type["sell"][code] = sell / unit
-        rates_by_type["send"][code] = send / unit
-        rates_by_type["receive"][code] = receive / unit
+        if unit != 1.0:
+            sale, buy, sell, send, receive = sale / unit, buy / unit, sell / unit, send / unit, receive / unit
+        sale_d[code] = sale
+        buy_d[code] = buy
+        sell_d[code] = sell
+        send_d[code] = send
+        receive_d[code] = receive
 
     fetched_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
-    return Snapshot(fetched_at=fetched_at, rates_by_type=rates_by_type)
+    return Snapshot(
+        fetched_at=fetched_at,
+        rates_by_type=rates_by_type,
+        source_last_modified=last_modified,
+    )
+
+
+def _previous_last_modified() -> str:
+    try:
+        previous = json.loads(OUT_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return ""
+    return str(previous.get("source_last_modified") or "")
 
 
 def main() -> None:
-    snap = fetch_snapshot()
+    snap = fetch_snapshot(_previous_last_modified())
+    if snap is None:
+        print("Source not modified; keeping the current snapshot.")
+        return
     build_sha = (os.getenv("GITHUB_SHA") or "")[:7]
 
     out = {
         "fetched_at": snap.fetched_at,
         "source": NAVER_EXCHANGE_LIST_URL,
         "build_sha": build_sha,
+        "source_last_modified": snap.source_last_modified,
         "rates_by_type": snap.rates_by_type,
-        "currencies": [
-            {"code": code, "label": meta["label"], "source_unit": meta["source_unit"]}
-            for code, meta in CURRENCY_META.items()
-        ],
+        "currencies": _CURRENCIES,
     }
 
-    out_path = Path(__file__).resolve().parents[1] / "docs" / "data" / "rates.json"
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    # Compact separators: the snapshot is fetched on every page load.
+    OUT_PATH.write_text(json.dumps(out, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
 
 
 if __name__ == "__main__":